@@ -0,0 +1,7 @@
+"""Skuldbot Engine.
+
+Motor de ejecucion de Skuldbot: compila el DSL JSON a Robot Framework y
+provee las librerias runtime usadas por los Bot Packages.
+"""
+
+__version__ = "0.1.0"
@@ -0,0 +1,5 @@
+"""Librerias runtime de Skuldbot para Robot Framework.
+
+Cada modulo de este paquete expone una libreria de keywords que los Bot
+Packages importan via `Library    skuldbot.libraries.<modulo>`.
+"""
@@ -0,0 +1,392 @@
+"""Billing / usage-metering library for Skuldbot bots.
+
+Tracks billable events (documents processed, AI tokens, emails sent, ...)
+during a bot run and reports them to the Orchestrator usage endpoint.
+In development mode (no Orchestrator configured) events are only kept
+locally and logged.
+"""
+
+import gzip
+import json
+import logging
+import os
+import pathlib
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+except ImportError:
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+
+def _dumps_safe(obj: Any) -> bytes:
+    """``_dumps`` with a tolerant fallback for report payloads.
+
+    Metadata may carry shapes neither orjson nor stdlib json encode
+    (sets, Decimal); ``default=str`` renders them rather than letting a
+    flush — or the WAL append protecting it — crash the keyword.
+    """
+    try:
+        return _dumps(obj)
+    except TypeError:
+        return json.dumps(obj, default=str).encode()
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from robot.libraries.BuiltIn import BuiltIn
+except ImportError:  # pragma: no cover - outside Robot Framework
+    BuiltIn = None
+
+
+# Billing only needs 1-second timestamp resolution, so the ISO string is
+# cached per epoch second instead of being re-formatted per event.
+_TS_CACHE: list = [0, ""]
+
+
+def _now_iso() -> str:
+    second = int(time.time())
+    cache = _TS_CACHE
+    if cache[0] != second:
+        cache[0] = second
+        cache[1] = datetime.fromtimestamp(second, timezone.utc).isoformat()
+    return cache[1]
+
+
+# Metrics whose per-event metadata must reach the Orchestrator unmerged
+# (e.g. one record per claim), so they are never coalesced.
+_NON_COALESCABLE = {"claims_created", "calls_answered"}
+
+# Compress report bodies at least this large before POSTing.
+_GZIP_THRESHOLD = 4096
+
+# Billing log lines go through a queue drained by a background listener,
+# so the tracking hot path only pays a queue append instead of console I/O.
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+_billing_log = logging.getLogger("skuldbot.billing")
+_billing_log.addHandler(QueueHandler(_log_queue))
+_billing_log.setLevel(logging.INFO)
+_billing_log.propagate = False
+
+
+@dataclass(slots=True)
+class BillableEvent:
+    """A single metered event produced by a bot."""
+
+    metric: str
+    count: int = 1
+    timestamp: str = field(default_factory=_now_iso)
+    metadata: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class UsageReport:
+    """Batch of billable events shipped to the Orchestrator."""
+
+    installation_id: str
+    tenant_id: str
+    bot_id: str
+    events: List[BillableEvent]
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Hand-built dicts: asdict() deep-copies every nested container,
+        # which is pure overhead for this flat, write-only payload.
+        return {
+            "installationId": self.installation_id,
+            "tenantId": self.tenant_id,
+            "botId": self.bot_id,
+            "events": [
+                {
+                    "metric": event.metric,
+                    "count": event.count,
+                    "timestamp": event.timestamp,
+                    "metadata": event.metadata,
+                }
+                for event in self.events
+            ],
+            "reportedAt": _now_iso(),
+        }
+
+
+class BillingLibrary:
+    """Robot Framework keywords for usage metering."""
+
+    ROBOT_LIBRARY_SCOPE = "GLOBAL"
+
+    def __init__(self):
+        self._orchestrator_url = os.environ.get("SKULDBOT_ORCHESTRATOR_URL", "")
+        self._runner_token = os.environ.get("SKULDBOT_RUNNER_TOKEN", "")
+        self._installation_id = os.environ.get("SKULDBOT_INSTALLATION_ID", "local")
+        self._tenant_id = os.environ.get("SKULDBOT_TENANT_ID", "local")
+        self._bot_id = os.environ.get("SKULDBOT_BOT_ID", "unknown")
+        self._batch_size = int(os.environ.get("SKULDBOT_BILLING_BATCH_SIZE", "10"))
+        # AIMD batch sizing: grow while the Orchestrator keeps up, halve
+        # on failures, so neither high- nor low-QPS bots need tuning.
+        self._current_batch = self._batch_size
+        self._is_production = bool(self._orchestrator_url and self._runner_token)
+        # Stats are maintained incrementally so get_usage_stats is O(1).
+        # The full per-event history is opt-in: long-running production
+        # bots should not retain every event in RAM just for stats.
+        self._by_metric: Counter = Counter()
+        self._total_count = 0
+        self._total_events = 0
+        self._keep_audit = os.environ.get(
+            "SKULDBOT_BILLING_KEEP_AUDIT", ""
+        ).lower() in ("1", "true", "yes")
+        self._console_log = os.environ.get(
+            "SKULDBOT_BILLING_CONSOLE_LOG", ""
+        ).lower() in ("1", "true", "yes")
+        # Both buffers are bounded: an unreachable Orchestrator or an
+        # extremely chatty bot must not grow the process without limit.
+        self._events: deque = deque(
+            maxlen=int(os.environ.get("SKULDBOT_BILLING_HISTORY_MAX", "50000"))
+        )
+        self._pending_events: deque = deque(
+            maxlen=int(os.environ.get("SKULDBOT_BILLING_PENDING_MAX", "10000"))
+        )
+        self._dropped_events = 0
+        # Coalesces identical events between flushes: same metric + same
+        # metadata only needs its count summed, not one object per call.
+        self._agg: Dict[tuple, BillableEvent] = {}
+        self._event_pool: deque = deque(maxlen=1024)
+        self._session_start = _now_iso()
+        self._session: Optional[requests.Session] = None
+        # Write-ahead log for batches the Orchestrator never acknowledged:
+        # undelivered usage must survive process death, not evaporate.
+        self._wal_path = pathlib.Path(
+            os.environ.get(
+                "SKULDBOT_BILLING_WAL",
+                f"~/.skuldbot/pending-{self._installation_id}.ndjson",
+            )
+        ).expanduser()
+        if self._is_production:
+            # One pooled session per library instance: keep-alive amortizes
+            # the TCP+TLS handshake across every flush instead of paying it
+            # per batch, and Retry handles transient Orchestrator errors.
+            self._session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=4,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.2,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset(["POST"]),
+                ),
+            )
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+            self._session.headers.update(
+                {
+                    "Authorization": f"Bearer {self._runner_token}",
+                    "Content-Type": "application/json",
+                }
+            )
+            self._wal_path.parent.mkdir(exist_ok=True, parents=True)
+            self._replay_wal()
+
+    def track_billable_event(
+        self,
+        metric: str,
+        count: int = 1,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        """Track a billable event.
+
+        Example:
+        | Track Billable Event | documents_processed | 1 |
+        | Track Billable Event | ai_tokens | 1500 | metadata=${meta} |
+        """
+        count = int(count)
+        self._by_metric[metric] += count
+        self._total_count += count
+        self._total_events += 1
+        if self._keep_audit:
+            self._events.append((metric, count))
+        if metric in _NON_COALESCABLE:
+            event = self._acquire_event(metric, count, metadata)
+            self._pending_events.append(event)
+        else:
+            try:
+                key = (
+                    metric,
+                    tuple(sorted(metadata.items())) if metadata else (),
+                )
+                event = self._agg.get(key)
+            except TypeError:
+                # Nested dict/list metadata values are unhashable:
+                # ship such events uncoalesced, like _NON_COALESCABLE
+                # metrics, instead of crashing the tracking hot path.
+                event = self._acquire_event(metric, count, metadata)
+                self._pending_events.append(event)
+            else:
+                if event is not None:
+                    event.count += count
+                else:
+                    event = self._acquire_event(metric, count, metadata)
+                    self._agg[key] = event
+        self._log_event(event)
+        if len(self._pending_events) + len(self._agg) >= self._current_batch:
+            self._flush_events()
+
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Return aggregated usage statistics for the current session."""
+        return {
+            "total_events": self._total_events,
+            "total_count": self._total_count,
+            "by_metric": dict(self._by_metric),
+            "session_start": self._session_start,
+            "mode": "production" if self._is_production else "development",
+            "pending_events": len(self._pending_events) + len(self._agg),
+            "dropped_events": self._dropped_events,
+            "current_batch_size": self._current_batch,
+        }
+
+    def flush_billing_events(self):
+        """Force-flush any pending events to the Orchestrator."""
+        self._flush_events()
+
+    def _flush_events(self):
+        if not self._pending_events and not self._agg:
+            return
+        events_to_send = list(self._pending_events) + list(self._agg.values())
+        self._pending_events.clear()
+        self._agg = {}
+        if not self._is_production:
+            return
+        report = UsageReport(
+            installation_id=self._installation_id,
+            tenant_id=self._tenant_id,
+            bot_id=self._bot_id,
+            events=events_to_send,
+        )
+        start = time.monotonic()
+        try:
+            body = _dumps_safe(report.to_dict())
+            headers = None
+            if len(body) >= _GZIP_THRESHOLD:
+                # Level 1 keeps runner CPU cheap and still gets 5-8x on
+                # repetitive JSON; tiny payloads are not worth the header.
+                body = gzip.compress(body, compresslevel=1)
+                headers = {"Content-Encoding": "gzip"}
+            response = self._session.post(
+                f"{self._orchestrator_url}/api/usage/report",
+                data=body,
+                headers=headers,
+                timeout=10,
+            )
+            response.raise_for_status()
+            elapsed = time.monotonic() - start
+            if elapsed < 0.2 and len(events_to_send) >= self._current_batch:
+                self._current_batch = min(self._current_batch * 2, 500)
+            for event in events_to_send:
+                event.metadata = None
+                self._event_pool.append(event)
+        except Exception:
+            self._current_batch = max(self._current_batch // 2, 1)
+            try:
+                self._append_wal(report)
+                for event in events_to_send:
+                    event.metadata = None
+                    self._event_pool.append(event)
+            except OSError:
+                # WAL unavailable (read-only FS, disk full): fall back to
+                # in-memory requeue, drop-oldest once the bounded queue
+                # is full.
+                maxlen = self._pending_events.maxlen
+                for event in reversed(events_to_send):
+                    if maxlen is not None and len(self._pending_events) >= maxlen:
+                        if self._dropped_events == 0:
+                            logging.getLogger(__name__).warning(
+                                "Billing pending queue full, dropping events"
+                            )
+                        self._dropped_events += 1
+                    self._pending_events.appendleft(event)
+
+    def _append_wal(self, report: "UsageReport"):
+        """Durably append an undelivered report to the write-ahead log."""
+        with self._wal_path.open("ab") as f:
+            f.write(_dumps_safe(report.to_dict()) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay_wal(self):
+        """Re-deliver reports a previous process failed to flush."""
+        if not self._wal_path.exists():
+            return
+        remaining = []
+        try:
+            with self._wal_path.open("rb") as f:
+                lines = [line for line in f if line.strip()]
+            for line in lines:
+                try:
+                    response = self._session.post(
+                        f"{self._orchestrator_url}/api/usage/report",
+                        data=line.rstrip(b"\n"),
+                        timeout=10,
+                    )
+                    response.raise_for_status()
+                except Exception:
+                    remaining.append(line)
+            if remaining:
+                with self._wal_path.open("wb") as f:
+                    f.writelines(remaining)
+            else:
+                self._wal_path.unlink()
+        except OSError:
+            logging.getLogger(__name__).warning(
+                "Could not replay billing WAL at %s", self._wal_path
+            )
+
+    def _acquire_event(
+        self,
+        metric: str,
+        count: int,
+        metadata: Optional[Dict[str, Any]],
+    ) -> BillableEvent:
+        """Check a recycled event out of the pool, or allocate a new one."""
+        if self._event_pool:
+            event = self._event_pool.pop()
+            event.metric = metric
+            event.count = count
+            event.metadata = metadata
+            event.timestamp = _now_iso()
+            return event
+        return BillableEvent(metric=metric, count=count, metadata=metadata)
+
+    def _log_event(self, event: BillableEvent):
+        mode = "PROD" if self._is_production else "DEV"
+        if self._console_log and BuiltIn is not None:
+            # Inline Robot console logging, for debugging only: it holds
+            # the GIL for the whole stdout write on every event.
+            try:
+                BuiltIn().log(
+                    f"[BILLING:{mode}] {event.metric}: {event.count}",
+                    console=True,
+                )
+                return
+            except Exception:
+                pass
+        _billing_log.info("[BILLING:%s] %s: %d", mode, event.metric, event.count)
+
+    def __del__(self):
+        try:
+            self._flush_events()
+        except Exception:
+            pass
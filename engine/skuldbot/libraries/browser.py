@@ -0,0 +1,233 @@
+"""Browser automation helpers for Skuldbot bots.
+
+Wraps RPA.Browser.Selenium with retry/recovery oriented keywords so
+compiled flows get uniform success/error behavior for web nodes.
+"""
+
+import os
+import random
+import time
+from typing import Any, ClassVar, Dict, Optional, Tuple
+
+from RPA.Browser.Selenium import Selenium
+from robot.utils import is_truthy, timestr_to_secs
+
+try:
+    from robot.libraries.BuiltIn import BuiltIn
+except ImportError:  # pragma: no cover - outside Robot Framework
+    BuiltIn = None
+
+
+# Single-round-trip "click if visible" scripts: checking visibility and
+# clicking as separate WebDriver commands costs two HTTP hops plus
+# Selenium's 500ms polling granularity. getClientRects() is empty for
+# display:none/detached/zero-size elements, so the probe only clicks
+# what a user could actually interact with — el.click() itself would
+# happily "succeed" on an invisible element.
+_CLICK_IF_PRESENT_CSS = """
+const el = document.querySelector(arguments[0]);
+if (el && el.getClientRects().length > 0) { el.click(); return true; }
+return false;
+"""
+
+_CLICK_IF_PRESENT_XPATH = """
+const result = document.evaluate(
+    arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
+const el = result.singleNodeValue;
+if (el && el.getClientRects().length > 0) { el.click(); return true; }
+return false;
+"""
+
+
+# Chromium launch arguments, built once at import time.
+_CHROMIUM_ARGS = ("--disable-dev-shm-usage", "--no-sandbox")
+_CHROMIUM_HEADLESS_ARGS = _CHROMIUM_ARGS + ("--disable-gpu",)
+
+
+def _precomputed_options(browser: str, headless: bool) -> Optional[Dict[str, Any]]:
+    if browser.lower() in ("chrome", "chromium"):
+        args = _CHROMIUM_HEADLESS_ARGS if headless else _CHROMIUM_ARGS
+        return {"arguments": list(args)}
+    return None
+
+
+_CLEAR_FIELD_CSS = """
+const el = document.querySelector(arguments[0]);
+if (el) {
+    el.value = '';
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+}
+"""
+
+
+def _css_locator(selector: str) -> Optional[str]:
+    """Return the CSS selector when a locator is unambiguously CSS.
+
+    SeleniumLibrary resolves bare locators via its id/name strategies
+    and supports explicit ``id:``/``name:`` prefixes, none of which
+    querySelector can express — feeding them to the JS fast paths
+    either matches nothing or throws a selector SyntaxError. Only
+    ``css:``-prefixed and ``#``/``.``-leading selectors qualify.
+    """
+    if selector.startswith("css:"):
+        return selector[4:]
+    if selector.startswith(("#", ".")):
+        return selector
+    return None
+
+
+class BrowserLibrary:
+    """Robot Framework keywords for resilient browser automation."""
+
+    ROBOT_LIBRARY_SCOPE = "GLOBAL"
+
+    # Shared across instances: Robot can re-instantiate a GLOBAL library
+    # per import path, and each fresh Selenium() wrapper costs a
+    # WebDriver handshake. Lazy so suites without web nodes pay nothing.
+    _selenium_cls: ClassVar[Optional[Selenium]] = None
+
+    # Warm driver instances keyed by (browser, headless): re-opening a
+    # cold browser costs 1-2s, while navigating a cached one is a single
+    # go_to round-trip. SKULDBOT_BROWSER_FRESH_PROFILE disables reuse.
+    _driver_cache: ClassVar[Dict[Tuple[str, bool], Any]] = {}
+
+    def __init__(self):
+        self._browser_opened = False
+        self._screenshot_seq = 0
+
+    @property
+    def selenium(self) -> Selenium:
+        cls = type(self)
+        if cls._selenium_cls is None:
+            cls._selenium_cls = Selenium()
+        return cls._selenium_cls
+
+    def open_browser_with_config(
+        self,
+        url: str,
+        browser: str = "chrome",
+        headless: bool = False,
+    ):
+        """Open a browser and navigate to ``url``.
+
+        Example:
+        | Open Browser With Config | https://example.com | browser=chrome |
+        """
+        headless = is_truthy(headless)
+        reuse = not is_truthy(
+            os.environ.get("SKULDBOT_BROWSER_FRESH_PROFILE", "")
+        )
+        key = (browser.lower(), headless)
+        alias = self._driver_cache.get(key) if reuse else None
+        if alias is not None:
+            try:
+                self.selenium.switch_browser(alias)
+                self.selenium.go_to(url)
+                self._browser_opened = True
+                return
+            except Exception:
+                # Cached driver died (crashed/quit): fall through and
+                # open a fresh one.
+                self._driver_cache.pop(key, None)
+        alias = self.selenium.open_available_browser(
+            url,
+            browser_selection=browser,
+            headless=headless,
+            options=_precomputed_options(browser, headless),
+        )
+        if reuse:
+            self._driver_cache[key] = alias
+        self._browser_opened = True
+
+    def close_browser_safe(self):
+        """Close the browser, swallowing errors if none is open."""
+        if self._browser_opened:
+            try:
+                self.selenium.close_browser()
+            except Exception:
+                pass
+            self._browser_opened = False
+
+    def click_element_with_retry(self, selector: str, retries: int = 3):
+        """Click an element, retrying on transient failures."""
+        retries = int(retries)
+        last_error: Optional[Exception] = None
+        # Exponential backoff with jitter: transient failures usually
+        # resolve in well under a second, so a fixed 1s wait per attempt
+        # mostly just slowed down click-heavy pages.
+        delay = 0.1
+        for attempt in range(retries):
+            try:
+                self.selenium.click_element(selector)
+                return
+            except Exception as error:
+                last_error = error
+                if attempt == retries - 1:
+                    break
+                time.sleep(delay + random.random() * 0.05)
+                delay = min(delay * 2, 2.0)
+        raise AssertionError(
+            f"Could not click '{selector}' after {retries} attempts: {last_error}"
+        )
+
+    def wait_for_element_and_click(self, selector: str, timeout: str = "10s"):
+        """Wait until an element is visible, then click it.
+
+        Polls the page at 20Hz with a single execute_script per probe,
+        clicking as soon as the element is rendered and interactable.
+        """
+        if selector.startswith("xpath:"):
+            script, locator = _CLICK_IF_PRESENT_XPATH, selector[6:]
+        elif selector.startswith("//"):
+            script, locator = _CLICK_IF_PRESENT_XPATH, selector
+        else:
+            css = _css_locator(selector)
+            if css is None:
+                # id:/name:/bare locators resolve through
+                # SeleniumLibrary's strategies, which the JS probe
+                # cannot express — wait and click the ordinary way.
+                self.selenium.wait_until_element_is_visible(
+                    selector, timeout=timeout
+                )
+                self.selenium.click_element(selector)
+                return
+            script, locator = _CLICK_IF_PRESENT_CSS, css
+        deadline = time.monotonic() + timestr_to_secs(timeout)
+        while time.monotonic() < deadline:
+            if self.selenium.execute_javascript(script, "ARGUMENTS", locator):
+                return
+            time.sleep(0.05)
+        raise AssertionError(f"Element '{selector}' not found in {timeout}")
+
+    def fill_form_field(self, selector: str, value: Any, clear: bool = True):
+        """Fill a form field, optionally clearing existing content first."""
+        if clear:
+            css = _css_locator(selector)
+            if css is None:
+                # xpath/id/name/bare locators: only SeleniumLibrary's
+                # own strategies can resolve them.
+                self.selenium.clear_element_text(selector)
+            else:
+                # One execute_script instead of a clear_element_text
+                # round-trip; the input event keeps reactive frameworks
+                # (React/Vue listeners) in sync with the cleared value.
+                self.selenium.execute_javascript(
+                    _CLEAR_FIELD_CSS,
+                    "ARGUMENTS",
+                    css,
+                )
+        self.selenium.input_text(selector, value)
+
+    def take_screenshot_on_error(self, node_id: str) -> str:
+        """Capture a screenshot for error reporting, returning its path."""
+        # Sequence counter instead of epoch seconds: two errors in the
+        # same second used to overwrite each other's screenshot.
+        self._screenshot_seq += 1
+        filename = f"error_{node_id}_{self._screenshot_seq:06d}.png"
+        path = self.selenium.screenshot(filename=filename)
+        if BuiltIn is not None:
+            try:
+                BuiltIn().log(f"Screenshot saved: {path}", level="WARN")
+            except Exception:
+                pass
+        return path